@@ -143,6 +143,7 @@ class CalcRecip(object):
         ~engine_locked
         ~engines
         ~forward
+        ~forward_batch
         ~forward_iter
         ~geometry_name
         ~geometry_table
@@ -701,16 +702,70 @@ class CalcRecip(object):
             )
 
     @_keep_physical_position
-    def forward(self, position, engine=None):
-        """Calculate real positions from pseudo positions."""
+    def forward(self, position, engine=None, max_solutions=None):
+        """
+        Calculate real positions from pseudo positions.
+
+        Return no more than ``max_solutions`` solutions
+        (all solutions if ``None``).
+        """
 
         with UsingEngine(self, engine):
             if self.engine is None:
                 raise ValueError("Engine unset")
 
-            self.engine.pseudo_positions = position
+            self.engine._solve(position, max_solutions=max_solutions)
             return self.engine.solutions
 
+    def forward_batch(self, positions, engine=None, max_solutions=None):
+        """
+        Calculate real positions for each of several pseudo positions.
+
+        Parameters
+        ----------
+        positions : list of pseudo positions
+            N pseudo positions, such as [(h, k, l), ...].
+        engine : str, optional
+            Calculation engine name.
+        max_solutions : int, optional
+            Keep no more than this many solutions for each pseudo
+            position (all solutions if ``None``).
+
+        Returns
+        -------
+        solutions : numpy.ndarray, shape (N, M, K)
+            Real positions of up to M solutions for each of the N
+            pseudo positions, K values (in the order of
+            ``physical_axis_names``) for each solution.  Unused
+            entries (fewer solutions or no solution) are NaN.
+        """
+        # Same as calling forward() for each position, but the lock, the
+        # engine and the initial physical position are handled once.
+        results = []
+        with self._lock, UsingEngine(self, engine):
+            if self.engine is None:
+                raise ValueError("Engine unset")
+
+            solve = self.engine._solve
+            initial_pos = self.physical_positions
+            for position in positions:
+                try:
+                    solve(list(position), max_solutions=max_solutions)
+                    results.append(self.engine.solutions)
+                except ValueError:
+                    results.append(())
+                finally:
+                    # each calculation starts from the same physical position
+                    self.physical_positions = initial_pos
+
+        n_solutions = max([len(s) for s in results], default=0)
+        n_axes = len(self.physical_axis_names)
+        array = np.full((len(results), n_solutions, n_axes), np.nan)
+        for i, solutions in enumerate(results):
+            if len(solutions) > 0:
+                array[i, : len(solutions)] = solutions
+        return array
+
     @_keep_physical_position
     def inverse(self, real):
         """Calculate pseudo positions from real positions."""
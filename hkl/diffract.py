@@ -10,9 +10,11 @@ Common Support for diffractometers
 
 """
 
+import collections
 import logging
+import math
 
-import pint
+import numpy as np
 import pyRestTable
 from ophyd import Component as Cpt
 from ophyd import PositionerBase
@@ -32,6 +34,19 @@ __all__ = """
 """.split()
 logger = logging.getLogger(__name__)
 
+# Factors to convert common energy units to keV, avoids pint on the hot path.
+_KEV_FACTORS = {"keV": 1.0, "eV": 1e-3, "meV": 1e-6, "MeV": 1e3, "GeV": 1e6}
+
+
+def _to_keV(value, units):
+    """Convert ``value`` (in ``units``) to keV."""
+    try:
+        return value * _KEV_FACTORS[units]
+    except KeyError:
+        import pint
+
+        return pint.Quantity(value, units).to("keV").magnitude
+
 
 class Diffractometer(PseudoPositioner):
     """Diffractometer pseudopositioner
@@ -61,9 +76,11 @@ class Diffractometer(PseudoPositioner):
         ~_calc_energy_update_permitted
         ~_constraints_dict
         ~_constraints_for_databroker
+        ~_constraints_tuple
         ~_energy_changed
         ~_energy_offset_changed
         ~_energy_units_changed
+        ~_fmt
         ~_push_current_constraints
         ~_set_constraints
         ~_update_calc_energy
@@ -110,6 +127,10 @@ class Diffractometer(PseudoPositioner):
         Maximum allowed number of iterations in the ``forward()``
         method before failing to find a forward() solution.
 
+    CONSTRAINTS_STACK_MAX : int (default value: 64)
+        Maximum number of saved constraints (for *undo* and *reset*).
+        When full, the oldest saved constraints are discarded.
+
     See Also
     --------
     :class:`~hkl.geometries.ApsPolar
@@ -133,6 +154,7 @@ class Diffractometer(PseudoPositioner):
     """
 
     calc_class = None
+    CONSTRAINTS_STACK_MAX = 64
 
     # see: Documentation has examples to use an EPICS PV for energy.
     energy = Cpt(Signal, value=8.0, doc="Energy (in keV)")
@@ -324,7 +346,15 @@ class Diffractometer(PseudoPositioner):
             getattr(self, attr).kind = "config"
         self.energy_update_calc_flag.kind = "config"
         self.orientation_attrs.kind = "config"  # orientation written as descriptors
-        self._constraints_stack = []
+        self._axis_fields = tuple(self.real_positioners._fields)
+        self._real_by_attr = {p.attr_name: p for p in self.real_positioners}
+        self._pseudo_list = self.pseudo_positioners
+        self._fmt_cache = {}  # see _fmt()
+        self._constraints_stack = collections.deque(maxlen=self.CONSTRAINTS_STACK_MAX)
+        # Latest values of the energy signals, updated by their subscriptions.
+        self._energy_cache = None
+        self._energy_offset_cache = None
+        self._energy_units_cache = None
 
         self.energy.subscribe(self._energy_changed, event_type=Signal.SUB_VALUE)
         self.energy_offset.subscribe(self._energy_offset_changed, event_type=Signal.SUB_VALUE)
@@ -344,6 +374,10 @@ class Diffractometer(PseudoPositioner):
             The `energy` signal is subscribed to this method
             in the :meth:`Diffractometer.__init__()` method.
         """
+        if kwargs.get("obj") is self.energy:
+            # only from the subscription, so the cache follows the signal
+            self._energy_cache = value
+
         if not self.connected:
             logger.warning(
                 # fmt: off
@@ -365,6 +399,10 @@ class Diffractometer(PseudoPositioner):
             The ``energy_offset`` signal is subscribed to this method
             in the :meth:`Diffractometer.__init__()` method.
         """
+        if kwargs.get("obj") is self.energy_offset:
+            # only from the subscription, so the cache follows the signal
+            self._energy_offset_cache = value
+
         if not self.connected:
             logger.warning(
                 # fmt: off
@@ -386,6 +424,10 @@ class Diffractometer(PseudoPositioner):
             The ``energy_units`` signal is subscribed to this method
             in the :meth:`Diffractometer.__init__()` method.
         """
+        if kwargs.get("obj") is self.energy_units:
+            # only from the subscription, so the cache follows the signal
+            self._energy_units_cache = value
+
         if not self.connected:
             logger.warning(
                 # fmt: off
@@ -413,16 +455,23 @@ class Diffractometer(PseudoPositioner):
             )
             return
 
-        value = float(self.energy.get())
+        # Use the values cached by the callbacks, read the signals if not yet known.
+        if self._energy_cache is None:
+            self._energy_cache = self.energy.get()
+        if self._energy_offset_cache is None:
+            self._energy_offset_cache = self.energy_offset.get()
+        if self._energy_units_cache is None:
+            self._energy_units_cache = self.energy_units.get()
+
+        value = float(self._energy_cache)
 
         # energy_offset has same units as energy
-        value += self.energy_offset.get()
+        value += self._energy_offset_cache
 
         # comment these lines to skip unit conversion
-        units = self.energy_units.get()
+        units = self._energy_units_cache
         if units != "keV":
-            keV = pint.Quantity(value, units).to("keV")
-            value = keV.magnitude
+            value = _to_keV(value, units)
 
         if value <= 0:
             logger.debug("Computed energy(%s) is not positive", value)
@@ -488,15 +537,15 @@ class Diffractometer(PseudoPositioner):
         if isinstance(pos, dict):
             # Redefine and fill in any missing values.
 
+            real_by_attr = self._real_by_attr
             for axis, target in pos.items():
-                if hasattr(self, axis):
-                    p = getattr(self, axis)
-                    if p in self.real_positioners:
-                        p.check_value(target)
-                else:
+                p = real_by_attr.get(axis)
+                if p is not None:
+                    p.check_value(target)
+                elif not hasattr(self, axis):
                     raise KeyError(f"{axis} not in {self.name}")
 
-            pos = [pos.get(p.attr_name, p.position) for p in self.pseudo_positioners]
+            pos = [pos.get(p.attr_name, p.position) for p in self._pseudo_list]
         super().check_value(pos)
 
     def apply_constraints(self, constraints):
@@ -505,29 +554,31 @@ class Diffractometer(PseudoPositioner):
 
         This action will first save the current constraints onto
         a stack, enabling both *undo* and *reset* features.
+        The stack holds up to ``CONSTRAINTS_STACK_MAX`` entries,
+        the oldest are discarded first.
         """
         self._push_current_constraints()
         self._set_constraints(constraints)
 
     def reset_constraints(self):
-        """Set constraints back to initial settings."""
+        """Set constraints back to initial (oldest saved) settings."""
         if len(self._constraints_stack) > 0:
             self._set_constraints(self._constraints_stack[0])
-            self._constraints_stack = []
+            self._constraints_stack.clear()
 
     @property
     def _constraints_dict(self):
         """Return the constraints."""
-        return {
-            # fmt:off
-            m: Constraint(
-                *self.calc[m].limits,
-                self.calc[m].value,
-                self.calc[m].fit,
-            )
-            # fmt:on
-            for m in self.RealPosition._fields
-        }
+        return dict(zip(self._axis_fields, self._constraints_tuple))
+
+    @property
+    def _constraints_tuple(self):
+        """Return the constraints, in the order of the real positioners."""
+        constraints = []
+        for m in self._axis_fields:
+            axis = self.calc[m]  # CalcParameter, look it up once per axis
+            constraints.append(Constraint(*axis.limits, axis.value, axis.fit))
+        return tuple(constraints)
 
     @property
     def _constraints_for_databroker(self):
@@ -540,12 +591,7 @@ class Diffractometer(PseudoPositioner):
         float.) The constraints will be written in the order of the real
         positioners.
         """
-        # fmt: off
-        return [
-            tuple(self._constraints_dict[p]._asdict().values())
-            for p in self.RealPosition._fields
-        ]
-        # fmt: on
+        return [tuple(c) for c in self._constraints_tuple]
 
     def get_axis_constraints(self, axis):
         """Show the constraints for one axis."""
@@ -572,21 +618,39 @@ class Diffractometer(PseudoPositioner):
 
     def _push_current_constraints(self):
         """push current constraints onto the stack"""
-        constraints = {
-            m: Constraint(*self.calc[m].limits, self.calc[m].value, self.calc[m].fit)
-            for m in self.real_positioners._fields
-        }
-        self._constraints_stack.append(constraints)
+        self._constraints_stack.append(self._constraints_tuple)
 
     def _set_constraints(self, constraints):
-        """set diffractometer's constraints"""
-        for axis, constraint in constraints.items():
-            self.calc[axis].limits = [
+        """
+        set diffractometer's constraints
+
+        ``constraints`` is either a dict of ``{axis: Constraint}`` or
+        a tuple of ``Constraint`` in the order of the real positioners.
+        """
+        if isinstance(constraints, dict):
+            constraints = constraints.items()
+        else:
+            constraints = zip(self._axis_fields, constraints)
+        for axis, constraint in constraints:
+            param = self.calc[axis]
+            param.limits = [
                 constraint.low_limit,
                 constraint.high_limit,
             ]
-            self.calc[axis].value = constraint.value
-            self.calc[axis].fit = constraint.fit
+            param.value = constraint.value
+            param.fit = constraint.fit
+
+    def _fmt(self, value):
+        """Return ``value`` formatted with 5 decimals, re-using earlier results."""
+        # copysign() keeps 0.0 and -0.0 (equal as dict keys) apart
+        key = (value, math.copysign(1.0, value))
+        text = self._fmt_cache.get(key)
+        if text is None:
+            if len(self._fmt_cache) >= 1024:
+                self._fmt_cache.clear()
+            text = f"{value:.5f}"
+            self._fmt_cache[key] = text
+        return text
 
     def forward_solutions_table(self, reflections, full=False, digits=5):
         """
@@ -609,22 +673,24 @@ class Diffractometer(PseudoPositioner):
         _table = pyRestTable.Table()
         motors = self.real_positioners._fields
         _table.labels = "(hkl) solution".split() + list(motors)
-        for reflection in reflections:
-            try:
-                solutions = self.calc.forward(reflection)
-            except ValueError as exc:
-                solutions = exc
-            if isinstance(solutions, ValueError):
-                row = [reflection, "none"]
-                row += ["" for m in motors]
-                _table.addRow(row)
-            else:
-                for i, s in enumerate(solutions):
-                    row = [reflection, i]
-                    row += [round(getattr(s, m), digits) for m in motors]
-                    _table.addRow(row)
-                    if not full:
-                        break  # only show the first (default) solution
+        no_solution = [""] * len(motors)
+        # only need the first (default) solution unless showing all
+        max_solutions = None if full else 1
+
+        reflections = list(reflections)  # iterated twice, below
+        solutions = self.calc.forward_batch(reflections, max_solutions=max_solutions)
+        # re-order the solution columns to match the real positioners
+        axis_names = self.calc.physical_axis_names
+        solutions = solutions[:, :, [axis_names.index(m) for m in motors]]
+        solved = ~np.isnan(solutions).all(axis=2)  # shape (N, M)
+        values = solutions.tolist()
+
+        for reflection, found, positions in zip(reflections, solved, values):
+            if not found.any():
+                _table.addRow([reflection, "none", *no_solution])
+                continue
+            for i in np.flatnonzero(found).tolist():
+                _table.addRow([reflection, i, *(round(v, digits) for v in positions[i])])
         return _table
 
     def pa(self, all_samples=False, printing=True):
@@ -673,7 +739,6 @@ class Diffractometer(PseudoPositioner):
             Out[3]: <pyRestTable.rest_table.Table at 0x7f5c16503e20>
 
         """
-
         def addTable(tbl):
             return str(tbl).strip()
 
@@ -686,18 +751,19 @@ class Diffractometer(PseudoPositioner):
         table.addRow(("diffractometer", self.name))
         table.addRow(("geometry", self.calc._geometry.name_get()))
         table.addRow(("class", self.__class__.__name__))
-        table.addRow(("energy (keV)", f"{self.calc.energy:.5f}"))
-        table.addRow(("wavelength (angstrom)", f"{self.calc.wavelength:.5f}"))
+        table.addRow(("energy (keV)", self._fmt(self.calc.energy)))
+        table.addRow(("wavelength (angstrom)", self._fmt(self.calc.wavelength)))
         table.addRow(("calc engine", self.calc.engine.name))
         table.addRow(("mode", self.calc.engine.mode))
 
         pt = pyRestTable.Table()
         pt.labels = "name value".split()
-        if self.calc._axis_name_to_original:
+        original_names = self.calc._axis_name_to_original
+        if original_names:
             pt.addLabel("original name")
         for item in self.real_positioners:
-            row = [item.attr_name, f"{item.position:.5f}"]
-            k = self.calc._axis_name_to_original.get(item.attr_name)
+            row = [item.attr_name, self._fmt(item.position)]
+            k = original_names.get(item.attr_name)
             if k is not None:
                 row.append(k)
             pt.addRow(row)
@@ -710,12 +776,15 @@ class Diffractometer(PseudoPositioner):
             samples = self.calc._samples.values()
         else:
             samples = [self.calc._sample]
+        units = self.calc._units
+        axis_names = self.calc.physical_axis_names
         for sample in samples:
             t = pyRestTable.Table()
             t.labels = "term value".split()
             nm = sample.name
             if all_samples and sample == self.calc.sample:
                 nm += " (*)"
+            lattice = sample.lattice
 
             # fmt: off
             t.addRow(
@@ -723,7 +792,7 @@ class Diffractometer(PseudoPositioner):
                     "unit cell edges",
                     Package(
                         **{
-                            k: getattr(sample.lattice, k)
+                            k: getattr(lattice, k)
                             for k in "a b c".split()
                         }
                     ),
@@ -734,7 +803,7 @@ class Diffractometer(PseudoPositioner):
                     "unit cell angles",
                     Package(
                         **{
-                            k: getattr(sample.lattice, k)
+                            k: getattr(lattice, k)
                             for k in "alpha beta gamma".split()
                         }
                     ),
@@ -744,7 +813,7 @@ class Diffractometer(PseudoPositioner):
 
             for i, ref in enumerate(sample._sample.reflections_get()):
                 h, k, l = ref.hkl_get()
-                pos_arr = ref.geometry_get().axis_values_get(self.calc._units)
+                pos_arr = ref.geometry_get().axis_values_get(units)
                 t.addRow((f"ref {i+1} (hkl)", Package(**dict(h=h, k=k, l=l))))
                 # fmt: off
                 t.addRow(
@@ -752,10 +821,8 @@ class Diffractometer(PseudoPositioner):
                         f"ref {i+1} positioners",
                         Package(
                             **{
-                                k: f"{v:.5f}"
-                                for k, v in zip(
-                                    self.calc.physical_axis_names, pos_arr
-                                )
+                                k: self._fmt(v)
+                                for k, v in zip(axis_names, pos_arr)
                             }
                         ),
                     )
@@ -817,16 +884,16 @@ class Diffractometer(PseudoPositioner):
         table.labels = "term value axis_type".split()
         table.addRow(("diffractometer", self.name, ""))
         table.addRow(("sample name", self.calc.sample.name, ""))
-        table.addRow(("energy (keV)", f"{self.calc.energy:.5f}", ""))
-        table.addRow(("wavelength (angstrom)", f"{self.calc.wavelength:.5f}", ""))
+        table.addRow(("energy (keV)", self._fmt(self.calc.energy), ""))
+        table.addRow(("wavelength (angstrom)", self._fmt(self.calc.wavelength), ""))
         table.addRow(("calc engine", self.calc.engine.name, ""))
         table.addRow(("mode", self.calc.engine.mode, ""))
 
-        pseudo_axes = [v.attr_name for v in self._pseudo]
-        real_axes = [v.attr_name for v in self._real]
-        for k in self._sig_attrs.keys():
+        pseudo_axes = frozenset(v.attr_name for v in self._pseudo)
+        real_axes = frozenset(v.attr_name for v in self._real)
+        for k in self._sig_attrs:
             v = getattr(self, k)
-            if not issubclass(v.__class__, PositionerBase):
+            if not isinstance(v, PositionerBase):
                 continue
             if k in real_axes:
                 label = "real"
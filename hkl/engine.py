@@ -314,6 +314,14 @@ class Engine(object):
 
     @pseudo_positions.setter
     def pseudo_positions(self, values):
+        self._solve(values)
+
+    def _solve(self, values, max_solutions=None):
+        """
+        Set the pseudo positions and keep (up to ``max_solutions``) solutions.
+
+        When ``max_solutions`` is ``None``, keep all solutions.
+        """
         try:
             geometry_list = self._engine.pseudo_axis_values_set(values, self._units)
         except util.GLib.GError as ex:
@@ -324,7 +332,10 @@ class Engine(object):
         def get_position(item):
             return Position(*item.geometry_get().axis_values_get(self._units))
 
-        self._solutions = [get_position(item) for item in geometry_list.items()]
+        items = geometry_list.items()
+        if max_solutions is not None:
+            items = items[:max_solutions]
+        self._solutions = [get_position(item) for item in items]
 
     def __getitem__(self, name):
         try:
@@ -6,6 +6,7 @@ import pytest
 from hkl import SimulatedE4CV
 from hkl.calc import A_KEV
 from hkl.diffract import Constraint
+from hkl.diffract import _to_keV
 
 
 class Fourc(SimulatedE4CV):
@@ -57,6 +58,29 @@ def test_energy(fourc):
         numpy.testing.assert_almost_equal(fourc.calc.wavelength, A_KEV / nrg)
 
 
+def test_energy_caches(fourc):
+    def check_caches():
+        assert fourc._energy_cache == fourc.energy.get()
+        assert fourc._energy_offset_cache == fourc.energy_offset.get()
+        assert fourc._energy_units_cache == fourc.energy_units.get()
+
+    fourc.energy.put(8.5)
+    fourc.energy_offset.put(0.01)
+    fourc.energy_units.put("eV")
+    check_caches()
+    fourc.energy.put(8500)
+    check_caches()
+    numpy.testing.assert_almost_equal(fourc.calc.energy, 8.50001)
+
+    # direct calls (not from the subscription) do not change the caches
+    fourc._energy_changed(12.0)
+    fourc._energy_offset_changed(5)
+    fourc._energy_units_changed("keV")
+    check_caches()
+    fourc._update_calc_energy()
+    numpy.testing.assert_almost_equal(fourc.calc.energy, 8.50001)
+
+
 def test_energy_offset(fourc):
     assert fourc.energy_offset.get() == 0
 
@@ -154,6 +178,21 @@ def test_energy_units_issue86(fourc):
     assert round(fourc.energy.get(), 1) == 8000
 
 
+@pytest.mark.parametrize(
+    "value, units",
+    [
+        [8.0, "keV"],
+        [8000, "eV"],
+        [8e6, "meV"],
+        [0.008, "MeV"],
+        [1.2817e-15, "J"],  # not in the lookup table, uses pint
+    ],
+)
+def test_to_keV(value, units):
+    expected = pint.Quantity(value, units).to("keV").magnitude
+    numpy.testing.assert_almost_equal(_to_keV(value, units), expected)
+
+
 def test_names(fourc):
     assert fourc.geometry_name.get() == "E4CV"
     assert fourc.class_name.get() == "Fourc"
@@ -201,6 +240,57 @@ def test_forward_solutions_table(fourc):
         assert r == e
 
 
+def test_forward_max_solutions(fourc):
+    fourc.energy.put(A_KEV / 1.54)
+    reflection = (1, 1, 1)
+
+    solutions = fourc.calc.forward(reflection)
+    assert len(solutions) > 1
+
+    first = fourc.calc.forward(reflection, max_solutions=1)
+    assert len(first) == 1
+    assert first[0] == solutions[0]
+
+    tbl = fourc.forward_solutions_table([reflection], full=True)
+    assert len(tbl.rows) == len(solutions)
+    tbl = fourc.forward_solutions_table([reflection])
+    assert len(tbl.rows) == 1
+
+
+def test_forward_batch(fourc):
+    fourc.energy.put(A_KEV / 1.54)
+    reflections = [(1, 1, 0), (1, 1, 1), (100, 1, 1)]
+    initial = fourc.calc.physical_positions
+
+    solutions = fourc.calc.forward_batch(reflections)
+    assert fourc.calc.physical_positions == initial
+    assert solutions.ndim == 3
+    assert solutions.shape[0] == len(reflections)
+    assert solutions.shape[2] == len(fourc.calc.physical_axis_names)
+    for reflection, result in zip(reflections[:2], solutions):
+        expected = fourc.calc.forward(reflection)
+        numpy.testing.assert_array_almost_equal(result[: len(expected)], expected)
+    assert numpy.isnan(solutions[2]).all()  # unreachable
+
+    solutions = fourc.calc.forward_batch(reflections, max_solutions=1)
+    assert solutions.shape == (len(reflections), 1, 4)
+
+
+@pytest.mark.parametrize(
+    "value, text",
+    [
+        [0, "0.00000"],
+        [0.0, "0.00000"],
+        [-0.0, "-0.00000"],
+        [1.54, "1.54000"],
+        [-123.456789, "-123.45679"],
+    ],
+)
+def test_fmt(value, text, fourc):
+    assert fourc._fmt(value) == text
+    assert fourc._fmt(value) == text  # again, from the cache
+
+
 def test_pa(fourc, capsys):
     tbl = fourc.pa()
     assert isinstance(tbl, pyRestTable.Table)
@@ -320,6 +410,35 @@ def test_apply_constraints(fourc):
     assert pytest.approx(sol.tth, abs=1e-5) == 60
 
 
+def test_undo_reset_constraints(fourc):
+    initial = fourc._constraints_dict
+    fourc.apply_constraints({"tth": Constraint(0, 180, 0, True)})
+    fourc.apply_constraints({"chi": Constraint(-90, 90, 0, True)})
+    assert fourc.get_axis_constraints("chi") == Constraint(-90, 90, 0, True)
+    assert fourc.get_axis_constraints("tth") == Constraint(0, 180, 0, True)
+
+    fourc.undo_last_constraints()
+    assert fourc.get_axis_constraints("chi") == initial["chi"]
+    assert fourc.get_axis_constraints("tth") == Constraint(0, 180, 0, True)
+
+    fourc.apply_constraints({"chi": Constraint(-90, 90, 0, True)})
+    fourc.reset_constraints()
+    assert fourc._constraints_dict == initial
+    assert len(fourc._constraints_stack) == 0
+
+
+def test_constraints_stack_bounded(fourc):
+    assert fourc._constraints_stack.maxlen == fourc.CONSTRAINTS_STACK_MAX
+    for i in range(fourc.CONSTRAINTS_STACK_MAX + 5):
+        fourc.apply_constraints({"tth": Constraint(0, 180, i, True)})
+    assert len(fourc._constraints_stack) == fourc.CONSTRAINTS_STACK_MAX
+
+    # initial settings were discarded, oldest remaining has value=4
+    fourc.reset_constraints()
+    assert fourc.get_axis_constraints("tth").value == 4
+    assert len(fourc._constraints_stack) == 0
+
+
 def test_specify_engine():
     import numpy as np
     from ophyd import Component as Cpt
@@ -4,6 +4,7 @@ import json
 import time
 
 import databroker
+import numpy as np
 import pytest
 from bluesky import plans as bp
 from bluesky.run_engine import RunEngine
@@ -264,3 +265,13 @@ def test_RE_documents(use_refl, e4cv):
     orientation = util.run_orientation_info(cat[uids[0]])
     assert isinstance(orientation, dict)
     assert e4cv.name in orientation
+
+
+def test_to_numpy_to_hkl_roundtrip():
+    arr = np.arange(9, dtype=float).reshape(3, 3) / 7
+    mat = util.to_hkl(arr)
+    ret = util.to_numpy(mat)
+    assert isinstance(ret, np.ndarray)
+    assert ret.shape == (3, 3)
+    np.testing.assert_array_almost_equal(ret, arr)
+    assert util.to_numpy(ret) is ret